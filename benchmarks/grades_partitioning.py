@@ -0,0 +1,125 @@
+"""Бенчмарк секционирования таблицы оценок
+
+Заполняет grades историей по учебным годам и после добавления каждого года измеряет:
+- фильтрацию студентов по оценке в текущем учебном году (academic_year);
+- фильтрацию по оценке без ограничения года (для сравнения);
+- добавление оценки в текущем учебном году.
+Задержки текущего года должны оставаться примерно постоянными при росте истории.
+
+ВНИМАНИЕ: пересоздаёт все таблицы в БД из настроек (.env), запускать только на отдельной базе:
+    python -m benchmarks.grades_partitioning --reset [--years 10] [--students 2000] [--courses 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+
+from sqlalchemy import text
+
+from crud.grades import create_grade
+from crud.students import get_students_filtered
+from db import AsyncSessionLocal, get_sync_engine
+from models import Base, StudentGrade, academic_year_bounds, academic_year_of
+from partitions import create_partitions
+from schemas.grade import GradeCreate
+from schemas.student import StudentFilter
+
+
+def seed_students(engine, students: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO students (first_name, last_name, birth_date, status, \"group\") "
+            "SELECT 'Name' || n, 'Surname' || n, DATE '2000-01-01' + n % 1500, 'ACTIVE', 'G' || n % 50 "
+            "FROM generate_series(1, :students) AS n"), {"students": students})
+        connection.execute(text(
+            "INSERT INTO contact_info (student_id, email, phone) "
+            "SELECT id, CASE WHEN id % 2 = 0 THEN 'student' || id || '@example.com' END, '+7000' || id "
+            "FROM students"))
+
+
+def seed_year(engine, year: int, courses: int) -> None:
+    year_start, _ = academic_year_bounds(year)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO grades (student_id, course_name, score, date) "
+            "SELECT s.id, 'course-' || c || '-' || :year, "
+            "(ARRAY['POOR','DEFICIENT','SATISFACTORY','GOOD','EXCELLENT'])[1 + (random() * 4)::int]::studentgrade, "
+            "CAST(:year_start AS date) + (random() * 300)::int "
+            "FROM students s CROSS JOIN generate_series(1, :courses) AS c"),
+            {"year": year, "year_start": year_start, "courses": courses})
+        connection.execute(text(
+            "INSERT INTO student_courses (student_id, course_name) "
+            "SELECT s.id, 'course-' || c || '-' || :year "
+            "FROM students s CROSS JOIN generate_series(1, :courses) AS c"),
+            {"year": year, "courses": courses})
+        connection.execute(text("ANALYZE grades"))
+        connection.execute(text("ANALYZE student_courses"))
+
+
+def count_grades(engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT count(*) FROM grades")).scalar_one()
+
+
+async def measure(samples: int, step: int, current_year: int, students: int) -> tuple[float, float, float]:
+    current_filter = StudentFilter(score_present=StudentGrade.EXCELLENT, academic_year=current_year, limit=50)
+    history_filter = StudentFilter(score_present=StudentGrade.EXCELLENT, limit=50)
+    timings = {"current": [], "history": [], "insert": []}
+
+    for sample in range(samples):
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            await get_students_filtered(session, current_filter)
+            timings["current"].append(time.perf_counter() - started)
+
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            await get_students_filtered(session, history_filter)
+            timings["history"].append(time.perf_counter() - started)
+
+        grade = GradeCreate(student_id=1 + sample % students, course_name=f"bench-{step}-{sample}",
+                            score=StudentGrade.GOOD, date=date.today())
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            await create_grade(session, grade)
+            timings["insert"].append(time.perf_counter() - started)
+
+    return tuple(statistics.median(values) * 1000 for values in timings.values())
+
+
+async def run(years: int, students: int, courses: int, samples: int) -> None:
+    engine = get_sync_engine()
+    current_year = academic_year_of(date.today())
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    create_partitions(engine, current_year - years, current_year + 1)
+    seed_students(engine, students)
+    seed_year(engine, current_year, courses)
+
+    print(f"{'history years':>13} {'grades':>10} {'current filter, ms':>19} "
+          f"{'all-time filter, ms':>20} {'insert, ms':>11}")
+    for step in range(years + 1):
+        if step:
+            seed_year(engine, current_year - step, courses)
+        current_ms, history_ms, insert_ms = await measure(samples, step, current_year, students)
+        print(f"{step:>13} {count_grades(engine):>10} {current_ms:>19.2f} {history_ms:>20.2f} {insert_ms:>11.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк секционирования таблицы grades")
+    parser.add_argument("--reset", action="store_true", help="подтвердить пересоздание всех таблиц")
+    parser.add_argument("--years", type=int, default=10, help="сколько учебных годов истории добавить")
+    parser.add_argument("--students", type=int, default=2000, help="количество студентов")
+    parser.add_argument("--courses", type=int, default=20, help="количество предметов в год у студента")
+    parser.add_argument("--samples", type=int, default=30, help="количество замеров на каждом шаге")
+    args = parser.parse_args()
+
+    if not args.reset:
+        parser.error("benchmark drops and recreates all tables, pass --reset to confirm")
+    asyncio.run(run(args.years, args.students, args.courses, args.samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 """Модуль с функциями добавления/удаления оценок"""
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from exceptions import DatabaseError
-from models import Grade, Student
+from models import Grade, Student, StudentCourse
 from schemas.grade import GradeCreate, GradeRead
 
 from log.logger import grades_logger
@@ -18,6 +18,12 @@ async def create_grade(session: AsyncSession, data: GradeCreate) -> GradeRead |
             Существует ли студент с указанным student_id
             Не существует ли уже оценка по этому предмету у этого студента
 
+        Note:
+            Таблица grades секционирована по date, поэтому одна оценка на предмет обеспечивается
+            первичным ключом student_courses: проверка - один поиск по индексу, не зависящий от числа
+            секций. Пары из отсоединённых и архивных секций тоже учитываются.
+            Если параллельный запрос успел добавить ту же пару, возвращается False
+
         Args:
             session: Асинхронная сессия SQLAlchemy
             data: Данные для создания оценки (student_id, course_name, score, date и т.д.)
@@ -35,8 +41,10 @@ async def create_grade(session: AsyncSession, data: GradeCreate) -> GradeRead |
     if student.scalars().first() is None:
         grades_logger.warning(f"Student with id={data.student_id} not found, cannot create grade")
         return False
-    existing_grade = await session.execute(select(Grade.id).where(Grade.student_id == data.student_id,
-                                                                  Grade.course_name == data.course_name))
+
+    existing_grade = await session.execute(select(StudentCourse.student_id)
+                                           .where(StudentCourse.student_id == data.student_id,
+                                                  StudentCourse.course_name == data.course_name))
     # Если оценка по предмету существует - не добавлять
     if existing_grade.scalars().one_or_none() is not None:
         grades_logger.warning(f"Grade for student_id={data.student_id},"
@@ -45,6 +53,7 @@ async def create_grade(session: AsyncSession, data: GradeCreate) -> GradeRead |
 
     grade = Grade(**data.model_dump())
     try:
+        session.add(StudentCourse(student_id=data.student_id, course_name=data.course_name))
         session.add(grade)
         await session.commit()
         await session.refresh(grade)
@@ -52,14 +61,16 @@ async def create_grade(session: AsyncSession, data: GradeCreate) -> GradeRead |
                            f"student_id={data.student_id},"f" course={data.course_name}")
         return GradeRead.model_validate(grade)
 
+    except IntegrityError as e:
+        # Оценку по предмету добавил параллельный запрос или студент был удалён
+        await session.rollback()
+        grades_logger.warning(f"Grade violates constraints for student_id={data.student_id},"
+                              f" course={data.course_name}: {e}")
+        return False
     except SQLAlchemyError as e:
         await session.rollback()
         grades_logger.error(f"Failed to create grade for student_id={data.student_id}: {e}", exc_info=True)
         raise DatabaseError("ERROR:Failed to add grade")
-    except IntegrityError:
-        await session.rollback()
-        grades_logger.error(f"Grade violates constraints for student_id={data.student_id}: {e}", exc_info=True)
-        raise DatabaseError("ERROR:Grade violates database constraints")
 
 
 async def delete_grade(session: AsyncSession, grade_id: int) -> bool:
@@ -86,6 +97,8 @@ async def delete_grade(session: AsyncSession, grade_id: int) -> bool:
             return False
 
         await session.delete(grade)
+        await session.execute(delete(StudentCourse).where(StudentCourse.student_id == grade.student_id,
+                                                          StudentCourse.course_name == grade.course_name))
         await session.commit()
         grades_logger.info(f"Grade with id={grade_id} deleted successfully")
         return True
@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
 from exceptions import DatabaseError
-from models import StudentStatus, Student, ContactInfo, Grade
+from models import StudentStatus, Student, ContactInfo, Grade, academic_year_bounds
 from schemas.contact_info import ContactInfoRead
 from schemas.student import StudentCreate, StudentRead, StudentUpdate, StudentFilter
 
@@ -162,8 +162,14 @@ async def get_students_filtered(session: AsyncSession, filters: StudentFilter) -
             group, last_name — точное совпадение
             has_email — есть ли email в контактах
             score_present — есть ли оценка с конкретным значением
+            academic_year — только оценки указанного учебного года (для score_present и в ответе)
             offset / limit — пагинация
 
+        Note:
+            При заданном academic_year и подзапрос score_present, и подгружаемые оценки студентов
+            ограничиваются датами этого учебного года, поэтому запрос читает одну секцию grades,
+            а в ответе возвращаются оценки только за этот год
+
         Args:
             session: Асинхронная сессия SQLAlchemy
             filters: Объект с параметрами фильтрации (все поля опциональны)
@@ -188,12 +194,20 @@ async def get_students_filtered(session: AsyncSession, filters: StudentFilter) -
             filter_conditions.append(Student.contact.has(ContactInfo.email.isnot(None)))
         else:
             filter_conditions.append(Student.contact.has(ContactInfo.email.is_(None)))
+
+    # Ограничение оценок учебным годом - отсечение остальных секций grades
+    grades_loader = joinedload(Student.grades)
+    grade_conditions = []
+    if filters.academic_year is not None:
+        year_start, year_end = academic_year_bounds(filters.academic_year)
+        grade_conditions.extend([Grade.date >= year_start, Grade.date < year_end])
+        grades_loader = joinedload(Student.grades.and_(*grade_conditions))
     if filters.score_present is not None:
-        subquery = select(Grade.student_id).where(Grade.score == filters.score_present)
+        subquery = select(Grade.student_id).where(Grade.score == filters.score_present, *grade_conditions)
         filter_conditions.append(Student.id.in_(subquery))
 
     try:
-        query = select(Student).options(joinedload(Student.grades))
+        query = select(Student).options(grades_loader)
         # При наличии фильтров, добавить их в запрос
         if filter_conditions:
             query = query.where(*filter_conditions)
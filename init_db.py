@@ -1,6 +1,11 @@
 from db import get_sync_engine
 from models import Base
+from partitions import ensure_default_partitions, migrate_grades_table
 
 
-Base.metadata.create_all(get_sync_engine())
+engine = get_sync_engine()
+# Существующая БД с несекционированной таблицей grades преобразуется однократно
+migrate_grades_table(engine)
+Base.metadata.create_all(engine)
+ensure_default_partitions(engine)
 
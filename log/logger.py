@@ -22,3 +22,4 @@ def create_rotating_logger(name: str, level=logging.INFO) -> logging.Logger:
 
 students_logger = create_rotating_logger("students_logger")
 grades_logger = create_rotating_logger("grades_logger")
+partitions_logger = create_rotating_logger("partitions_logger")
@@ -1,7 +1,7 @@
 from enum import IntEnum, StrEnum
 from typing import Optional
 
-from sqlalchemy import ForeignKey, UniqueConstraint, Date
+from sqlalchemy import ForeignKey, Date, Index
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from datetime import date
 
@@ -20,6 +20,20 @@ class StudentStatus(StrEnum):
     GRADUATED = "graduated"
 
 
+# Учебный год начинается 1 сентября: оценка от 2025-10-01 относится к 2025/2026 году
+ACADEMIC_YEAR_START_MONTH = 9
+
+
+def academic_year_of(day: date) -> int:
+    """Возвращает учебный год (год его начала), к которому относится дата"""
+    return day.year if day.month >= ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def academic_year_bounds(year: int) -> tuple[date, date]:
+    """Возвращает границы учебного года [начало, конец)"""
+    return date(year, ACADEMIC_YEAR_START_MONTH, 1), date(year + 1, ACADEMIC_YEAR_START_MONTH, 1)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -55,12 +69,31 @@ class ContactInfo(Base):
 class Grade(Base):
     __tablename__ = "grades"
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    # Таблица секционирована по date (одна секция на учебный год, см. partitions.py),
+    # поэтому ключ секционирования обязан входить в первичный ключ
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     course_name: Mapped[str] = mapped_column(nullable=False)
     score: Mapped[StudentGrade] = mapped_column(nullable=False)
-    date: Mapped[date] = mapped_column(Date, nullable=False)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
 
     student: Mapped["Student"] = relationship(back_populates="grades")
 
-    __table_args__ = (UniqueConstraint("student_id", "course_name", name="uq_student_course"),)
+    # Уникальность пары (student_id, course_name) по всем секциям, включая отсоединённые,
+    # обеспечивает несекционированная таблица student_courses (см. StudentCourse)
+    __table_args__ = (Index("ix_grades_student_id", "student_id"),
+                      Index("ix_grades_score_student", "score", "student_id"),
+                      {"postgresql_partition_by": "RANGE (date)"})
+
+
+class StudentCourse(Base):
+    """Пары (студент, предмет), по которым у студента есть оценка.
+
+    Секционированная таблица grades не может иметь уникальное ограничение без date,
+    поэтому одна оценка на предмет обеспечивается первичным ключом этой таблицы.
+    Строки не удаляются при отсоединении или архивации секций grades.
+    """
+    __tablename__ = "student_courses"
+
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    course_name: Mapped[str] = mapped_column(primary_key=True)
@@ -0,0 +1,314 @@
+"""Модуль управления секциями таблицы оценок
+
+Таблица grades секционирована по диапазону date, одна секция на учебный год
+(с 1 сентября по 31 августа), секция называется grades_<начало>_<конец>, например grades_2025_2026.
+Оценки с датами вне созданных секций попадают в секцию по умолчанию grades_default и
+переносятся в секцию учебного года при её создании.
+Текущие годы - "горячие" секции, старые можно отсоединить или перенести в архивную схему.
+
+Команды:
+- python partitions.py list: показать подключённые секции.
+- python partitions.py create [--since YEAR] [--ahead N]: создать секции до текущего года + N.
+- python partitions.py detach --before YEAR: отсоединить секции учебных годов раньше YEAR.
+- python partitions.py archive --before YEAR [--schema SCHEMA] [--tablespace TABLESPACE]:
+  отсоединить секции (в том числе уже отсоединённые) и перенести их в архивную схему
+  (и табличное пространство).
+- python partitions.py migrate: преобразовать несекционированную таблицу grades в секционированную.
+"""
+import argparse
+import re
+from datetime import date
+
+from sqlalchemy import Connection, Engine, text
+
+from log.logger import partitions_logger
+from models import ACADEMIC_YEAR_START_MONTH, Grade, StudentCourse, academic_year_bounds, academic_year_of
+
+GRADES_TABLE = Grade.__tablename__
+DEFAULT_PARTITION = f"{GRADES_TABLE}_default"
+LEGACY_TABLE = f"{GRADES_TABLE}_legacy"
+PARTITION_NAME_RE = re.compile(rf"^{GRADES_TABLE}_(\d{{4}})_(\d{{4}})$")
+
+# Секции, создаваемые при инициализации БД относительно текущего учебного года
+DEFAULT_YEARS_BEHIND = 1
+DEFAULT_YEARS_AHEAD = 1
+DEFAULT_ARCHIVE_SCHEMA = "archive"
+# Годы, для которых имя секции соответствует PARTITION_NAME_RE
+MIN_PARTITION_YEAR = 1000
+MAX_PARTITION_YEAR = 9998
+
+
+def partition_name(year: int) -> str:
+    """Возвращает имя секции для учебного года"""
+    return f"{GRADES_TABLE}_{year}_{year + 1}"
+
+
+def _partition_years(names) -> list[int]:
+    years = []
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years)
+
+
+def _attached_partition_names(connection: Connection) -> list[str]:
+    query = text("SELECT c.relname FROM pg_inherits i "
+                 "JOIN pg_class c ON c.oid = i.inhrelid "
+                 "WHERE i.inhparent = CAST(:parent AS regclass)")
+    return connection.execute(query, {"parent": GRADES_TABLE}).scalars().all()
+
+
+def _detached_partition_years(connection: Connection) -> list[int]:
+    # Отсоединённые секции - обычные таблицы grades_YYYY_YYYY в текущей схеме
+    query = text("SELECT c.relname FROM pg_class c "
+                 "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                 "WHERE n.nspname = current_schema() AND c.relkind = 'r' AND NOT c.relispartition")
+    return _partition_years(connection.execute(query).scalars().all())
+
+
+def _grades_relkind(connection: Connection) -> str | None:
+    query = text("SELECT c.relkind FROM pg_class c "
+                 "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                 "WHERE n.nspname = current_schema() AND c.relname = :name")
+    return connection.execute(query, {"name": GRADES_TABLE}).scalar_one_or_none()
+
+
+def _create_partitions(connection: Connection, years) -> list[int]:
+    names = _attached_partition_names(connection)
+    existing = set(_partition_years(names))
+    detached = set(_detached_partition_years(connection))
+    missing = []
+    for year in years:
+        if year in detached:
+            # Таблица с таким именем уже есть, оценки этого года попадают в grades_default
+            partitions_logger.warning(f"Partition {partition_name(year)} is detached, skipping")
+        elif year not in existing:
+            missing.append(year)
+    if DEFAULT_PARTITION in names and not missing:
+        return []
+
+    # Без блокировки оценка, добавленная между переносом строк и созданием секции,
+    # попала бы в grades_default и CREATE TABLE ... PARTITION OF завершился бы ошибкой
+    connection.execute(text(f"LOCK TABLE {GRADES_TABLE} IN SHARE ROW EXCLUSIVE MODE"))
+    if DEFAULT_PARTITION not in names:
+        partitions_logger.info(f"Creating partition {DEFAULT_PARTITION}")
+        connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {GRADES_TABLE} DEFAULT"))
+
+    created = []
+    for year in missing:
+        name = partition_name(year)
+        year_start, year_end = academic_year_bounds(year)
+        bounds = {"year_start": year_start, "year_end": year_end}
+        partitions_logger.info(f"Creating partition {name}")
+
+        # Оценки этого года из секции по умолчанию нарушили бы границы новой секции:
+        # они временно выносятся и возвращаются в grades уже после её создания
+        connection.execute(text(f"CREATE TEMPORARY TABLE moved_grades (LIKE {GRADES_TABLE}) ON COMMIT DROP"))
+        connection.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE date >= :year_start AND date < :year_end RETURNING *) "
+            f"INSERT INTO moved_grades SELECT * FROM moved"), bounds)
+        connection.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {GRADES_TABLE} "
+            f"FOR VALUES FROM ('{year_start.isoformat()}') TO ('{year_end.isoformat()}')"))
+        connection.execute(text(f"INSERT INTO {GRADES_TABLE} SELECT * FROM moved_grades"))
+        connection.execute(text("DROP TABLE moved_grades"))
+        created.append(year)
+    return created
+
+
+def list_partitions(engine: Engine) -> list[int]:
+    """
+        Возвращает учебные годы секций, подключённых к таблице grades.
+
+        Args:
+            engine: Синхронный движок SQLAlchemy
+
+        Returns:
+            list[int]: Отсортированный список учебных годов
+    """
+    with engine.connect() as connection:
+        return _partition_years(_attached_partition_names(connection))
+
+
+def create_partitions(engine: Engine, first_year: int, last_year: int) -> list[int]:
+    """
+        Создаёт недостающие секции для учебных годов с first_year по last_year включительно
+        и секцию по умолчанию, если её нет. Годы отсоединённых секций пропускаются.
+        На время создания таблица grades блокируется для записи, поэтому запускать вне нагрузки.
+
+        Args:
+            engine: Синхронный движок SQLAlchemy
+            first_year: Первый учебный год
+            last_year: Последний учебный год
+
+        Returns:
+            list[int]: Учебные годы созданных секций
+    """
+    with engine.begin() as connection:
+        return _create_partitions(connection, range(first_year, last_year + 1))
+
+
+def detach_partitions(engine: Engine, before_year: int) -> list[int]:
+    """
+        Отсоединяет секции учебных годов раньше before_year.
+        Отсоединённые секции остаются обычными таблицами, но не участвуют в запросах к grades.
+        Новые оценки отсоединённых годов попадают в grades_default.
+        Пары (студент, предмет) из них остаются в student_courses и по-прежнему уникальны.
+
+        Args:
+            engine: Синхронный движок SQLAlchemy
+            before_year: Первый учебный год, секция которого остаётся подключённой
+
+        Returns:
+            list[int]: Учебные годы отсоединённых секций
+    """
+    with engine.begin() as connection:
+        detached = [year for year in _partition_years(_attached_partition_names(connection)) if year < before_year]
+        for year in detached:
+            partitions_logger.info(f"Detaching partition {partition_name(year)}")
+            connection.execute(text(f"ALTER TABLE {GRADES_TABLE} DETACH PARTITION {partition_name(year)}"))
+    return detached
+
+
+def archive_partitions(engine: Engine, before_year: int, schema: str = DEFAULT_ARCHIVE_SCHEMA,
+                       tablespace: str | None = None) -> list[int]:
+    """
+        Отсоединяет секции учебных годов раньше before_year и переносит их в архивную схему.
+        Ранее отсоединённые командой detach секции тоже переносятся.
+
+        Args:
+            engine: Синхронный движок SQLAlchemy
+            before_year: Первый учебный год, секция которого остаётся подключённой
+            schema: Схема для архивных секций
+            tablespace: Табличное пространство для архивных секций (например, на медленном диске)
+
+        Returns:
+            list[int]: Учебные годы архивированных секций
+    """
+    with engine.begin() as connection:
+        quote = connection.dialect.identifier_preparer.quote
+        attached = [year for year in _partition_years(_attached_partition_names(connection)) if year < before_year]
+        detached = [year for year in _detached_partition_years(connection) if year < before_year]
+
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {quote(schema)}"))
+        for year in attached:
+            partitions_logger.info(f"Detaching partition {partition_name(year)}")
+            connection.execute(text(f"ALTER TABLE {GRADES_TABLE} DETACH PARTITION {partition_name(year)}"))
+
+        archived = sorted(attached + detached)
+        for year in archived:
+            name = partition_name(year)
+            partitions_logger.info(f"Archiving partition {name} to schema {schema}")
+            connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {quote(schema)}"))
+            if tablespace is not None:
+                connection.execute(text(f"ALTER TABLE {quote(schema)}.{name} SET TABLESPACE {quote(tablespace)}"))
+    return archived
+
+
+def migrate_grades_table(engine: Engine) -> bool:
+    """
+        Однократно преобразует несекционированную таблицу grades в секционированную.
+
+        Старая таблица переименовывается, создаются секционированная grades и student_courses,
+        секции для прошлого, текущего и следующего учебных годов и для годов, в которых есть оценки
+        (даты вне 1000-9998 годов остаются в grades_default), строки копируются с прежними id,
+        последовательность id продолжается с max(id). Старая таблица удаляется.
+        Всё выполняется в одной транзакции.
+
+        Args:
+            engine: Синхронный движок SQLAlchemy
+
+        Returns:
+            bool: True — если таблица была преобразована, False — если преобразование не требуется
+    """
+    with engine.begin() as connection:
+        # 'r' - обычная таблица, 'p' - секционированная, None - таблицы ещё нет
+        if _grades_relkind(connection) != "r":
+            return False
+        partitions_logger.info(f"Migrating {GRADES_TABLE} to a partitioned table")
+
+        # Имена индексов и последовательностей уникальны в схеме, поэтому освобождаются для новой таблицы
+        connection.execute(text(f"ALTER TABLE {GRADES_TABLE} RENAME TO {LEGACY_TABLE}"))
+        connection.execute(text(f"ALTER INDEX IF EXISTS {GRADES_TABLE}_pkey RENAME TO {LEGACY_TABLE}_pkey"))
+        connection.execute(text(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT {GRADES_TABLE}_student_id_fkey "
+                                f"TO {LEGACY_TABLE}_student_id_fkey"))
+        connection.execute(text(f"ALTER SEQUENCE IF EXISTS {GRADES_TABLE}_id_seq RENAME TO {LEGACY_TABLE}_id_seq"))
+
+        Grade.metadata.create_all(connection, tables=[Grade.__table__, StudentCourse.__table__])
+
+        # Опечатка в дате не должна создавать сотни пустых секций: только годы, в которых есть оценки
+        current_year = academic_year_of(date.today())
+        years = set(range(current_year - DEFAULT_YEARS_BEHIND, current_year + DEFAULT_YEARS_AHEAD + 1))
+        years.update(connection.execute(text(
+            f"SELECT DISTINCT CAST(extract(year FROM date - interval '{ACADEMIC_YEAR_START_MONTH - 1} months') AS int) "
+            f"FROM {LEGACY_TABLE}")).scalars().all())
+        _create_partitions(connection, sorted(year for year in years if MIN_PARTITION_YEAR <= year <= MAX_PARTITION_YEAR))
+
+        connection.execute(text(
+            f"INSERT INTO {GRADES_TABLE} (id, student_id, course_name, score, date) "
+            f"SELECT id, student_id, course_name, score, date FROM {LEGACY_TABLE}"))
+        connection.execute(text(
+            f"INSERT INTO {StudentCourse.__tablename__} (student_id, course_name) "
+            f"SELECT DISTINCT student_id, course_name FROM {LEGACY_TABLE} ON CONFLICT DO NOTHING"))
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{GRADES_TABLE}', 'id'), "
+            f"coalesce(max(id), 1), max(id) IS NOT NULL) FROM {GRADES_TABLE}"))
+        connection.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+    return True
+
+
+def ensure_default_partitions(engine: Engine) -> list[int]:
+    """Создаёт секции для прошлого, текущего и следующего учебных годов и секцию по умолчанию"""
+    current_year = academic_year_of(date.today())
+    return create_partitions(engine, current_year - DEFAULT_YEARS_BEHIND, current_year + DEFAULT_YEARS_AHEAD)
+
+
+def main() -> None:
+    from db import get_sync_engine
+
+    current_year = academic_year_of(date.today())
+    parser = argparse.ArgumentParser(description="Управление секциями таблицы grades")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="показать подключённые секции")
+    commands.add_parser("migrate", help="преобразовать несекционированную таблицу grades")
+
+    create_parser = commands.add_parser("create", help="создать секции для будущих учебных годов")
+    create_parser.add_argument("--since", type=int, default=current_year - DEFAULT_YEARS_BEHIND,
+                               help="первый учебный год")
+    create_parser.add_argument("--ahead", type=int, default=DEFAULT_YEARS_AHEAD,
+                               help="сколько учебных годов после текущего создать")
+
+    detach_parser = commands.add_parser("detach", help="отсоединить старые секции")
+    detach_parser.add_argument("--before", type=int, required=True,
+                               help="отсоединить секции учебных годов раньше указанного")
+
+    archive_parser = commands.add_parser("archive", help="перенести старые секции в архив")
+    archive_parser.add_argument("--before", type=int, required=True,
+                                help="архивировать секции учебных годов раньше указанного")
+    archive_parser.add_argument("--schema", default=DEFAULT_ARCHIVE_SCHEMA, help="архивная схема")
+    archive_parser.add_argument("--tablespace", default=None, help="табличное пространство для архива")
+
+    args = parser.parse_args()
+    engine = get_sync_engine()
+
+    if args.command == "migrate":
+        print("migrated" if migrate_grades_table(engine) else "nothing to migrate")
+        return
+    if args.command == "list":
+        years = list_partitions(engine)
+    elif args.command == "create":
+        years = create_partitions(engine, args.since, current_year + args.ahead)
+    elif args.command == "detach":
+        years = detach_partitions(engine, args.before)
+    else:
+        years = archive_partitions(engine, args.before, args.schema, args.tablespace)
+
+    for year in years:
+        print(partition_name(year))
+
+
+if __name__ == "__main__":
+    main()
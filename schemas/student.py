@@ -3,7 +3,7 @@
 from datetime import date
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from models import StudentStatus, StudentGrade
 
@@ -64,6 +64,9 @@ class StudentFilter(BaseModel):
     born_after: Optional[date] = None
     group: Optional[str] = None
     has_email: Optional[bool] = None
+    academic_year: Optional[int] = Field(default=None, ge=1, le=9998,
+                                         description="Учебный год (год начала): score_present ищется "
+                                                     "в этом году, в ответе - оценки только за этот год")
 
     limit: int = 10
     offset: int = 0